@@ -10,6 +10,10 @@ This Streamlit application provides:
 - Interactive UI controls for frequency and waveform selection
 """
 
+import html
+import json
+from string import Template
+
 import streamlit as st
 import streamlit.components.v1 as components
 
@@ -29,21 +33,31 @@ synthesized on the fly in your browser.
 """)
 
 # Sidebar controls
+# The controls live in a form, so dragging a slider doesn't rerun the script;
+# the new settings are applied all at once when "Apply" is pressed
 st.sidebar.header("Audio Controls")
-st.sidebar.markdown("### Tone Generator Settings")
+audio_controls = st.sidebar.form("audio_controls")
+audio_controls.markdown("### Tone Generator Settings")
+
+# Slider steps are deliberately coarse: finer changes are inaudible, and
+# fewer distinct settings means more hits in the render_audio_component cache
+
+# Lowest frequency the slider allows; also sent to the component, which
+# sizes its PeriodicWaves for it
+MIN_FREQUENCY = 200
 
 # Frequency slider (200-800 Hz, default 440 Hz - A4 note)
-frequency = st.sidebar.slider(
+frequency = audio_controls.slider(
     "Frequency (Hz)",
-    min_value=200,
+    min_value=MIN_FREQUENCY,
     max_value=800,
     value=440,
-    step=1,
+    step=5,
     help="Adjust the frequency of the tone. 440 Hz is the standard A4 note."
 )
 
 # Waveform selection dropdown
-waveform = st.sidebar.selectbox(
+waveform = audio_controls.selectbox(
     "Waveform Type",
     options=["sine", "square", "sawtooth", "triangle"],
     index=0,
@@ -51,45 +65,58 @@ waveform = st.sidebar.selectbox(
 )
 
 # ADSR envelope controls
-st.sidebar.markdown("### ADSR Envelope")
-st.sidebar.markdown("Control the amplitude envelope of the sound:")
+audio_controls.markdown("### ADSR Envelope")
+audio_controls.markdown("Control the amplitude envelope of the sound:")
 
-attack = st.sidebar.slider(
+attack = audio_controls.slider(
     "Attack (s)",
-    min_value=0.01,
+    min_value=0.05,
     max_value=2.0,
     value=0.1,
-    step=0.01,
+    step=0.05,
     help="Time for the sound to reach full volume"
 )
 
-decay = st.sidebar.slider(
+decay = audio_controls.slider(
     "Decay (s)",
-    min_value=0.01,
+    min_value=0.05,
     max_value=2.0,
     value=0.2,
-    step=0.01,
+    step=0.05,
     help="Time for the sound to drop to sustain level"
 )
 
-sustain = st.sidebar.slider(
+sustain = audio_controls.slider(
     "Sustain Level",
     min_value=0.0,
     max_value=1.0,
     value=0.5,
-    step=0.01,
+    step=0.05,
     help="The level at which the sound holds during the note"
 )
 
-release = st.sidebar.slider(
+release = audio_controls.slider(
     "Release (s)",
-    min_value=0.01,
+    min_value=0.05,
     max_value=3.0,
     value=0.3,
-    step=0.01,
+    step=0.05,
     help="Time for the sound to fade out after note release"
 )
 
+submitted = audio_controls.form_submit_button("Apply")
+
+# Keep the last applied settings; the audio component is rendered from these
+if submitted or "params" not in st.session_state:
+    st.session_state.params = {
+        "frequency": frequency,
+        "waveform": waveform,
+        "attack": attack,
+        "decay": decay,
+        "sustain": sustain,
+        "release": release,
+    }
+
 # Main content area
 col1, col2 = st.columns([2, 1])
 
@@ -113,25 +140,32 @@ with col2:
     """)
 
 # Web Audio implementation using HTML/JavaScript
-# This component will handle all the audio processing
-audio_component_html = f"""
+# This component will handle all the audio processing.
+# STATIC_HTML is a plain string (not an f-string), so it is identical on every
+# rerun; the current settings are injected by a small #params script appended
+# at render time and read by the JS when a note is played.
+STATIC_HTML = """
 <!DOCTYPE html>
 <html>
 <head>
-    <style>
-        body {{
+    <script>
+        // Component styles, applied as a constructable stylesheet instead of a
+        // <style> block; the sheet is built once per window and re-adopted.
+        // Browsers without adoptedStyleSheets get a plain <style> element.
+        const MULBERRY_CSS = `
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             margin: 0;
             padding: 20px;
             background-color: transparent;
-        }}
-        .controls {{
+        }
+        .controls {
             display: flex;
             gap: 10px;
             margin-bottom: 20px;
             flex-wrap: wrap;
-        }}
-        button {{
+        }
+        button {
             padding: 12px 24px;
             font-size: 16px;
             cursor: pointer;
@@ -140,57 +174,69 @@ audio_component_html = f"""
             transition: all 0.3s ease;
             font-weight: 600;
             box-shadow: 0 2px 8px rgba(0,0,0,0.1);
-        }}
-        .play-tone {{
+        }
+        .play-tone {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
-        }}
-        .play-tone:hover {{
+        }
+        .play-tone:hover {
             transform: translateY(-2px);
             box-shadow: 0 4px 12px rgba(102, 126, 234, 0.4);
-        }}
-        .play-tone:active {{
+        }
+        .play-tone:active {
             transform: translateY(0);
-        }}
-        .play-scale {{
+        }
+        .play-scale {
             background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
             color: white;
-        }}
-        .play-scale:hover {{
+        }
+        .play-scale:hover {
             transform: translateY(-2px);
             box-shadow: 0 4px 12px rgba(245, 87, 108, 0.4);
-        }}
-        .play-scale:active {{
+        }
+        .play-scale:active {
             transform: translateY(0);
-        }}
-        button:disabled {{
+        }
+        button:disabled {
             opacity: 0.5;
             cursor: not-allowed;
             transform: none !important;
-        }}
-        .info {{
+        }
+        .info {
             margin-top: 20px;
             padding: 15px;
             background-color: #f0f4ff;
             border-left: 4px solid #667eea;
             border-radius: 4px;
-        }}
-        .info h3 {{
+        }
+        .info h3 {
             margin-top: 0;
             color: #667eea;
-        }}
-        .status {{
+        }
+        .status {
             margin-top: 10px;
             padding: 10px;
             background-color: #e8f5e9;
             border-radius: 4px;
             font-family: monospace;
             display: none;
-        }}
-        .status.active {{
+        }
+        .status.active {
             display: block;
-        }}
-    </style>
+        }
+        `;
+        if ('adoptedStyleSheets' in document) {
+            if (!window.__mulberrySheet) {
+                window.__mulberrySheet = new CSSStyleSheet();
+                window.__mulberrySheet.replaceSync(MULBERRY_CSS);
+            }
+            document.adoptedStyleSheets = [window.__mulberrySheet];
+        } else {
+            const style = document.createElement('style');
+            style.textContent = MULBERRY_CSS;
+            document.head.appendChild(style);
+        }
+    </script>
 </head>
 <body>
     <div class="controls">
@@ -205,7 +251,8 @@ audio_component_html = f"""
         <p><strong>Audio Context:</strong> The browser's audio processing engine that manages all sound generation.</p>
         <p><strong>Oscillator Node:</strong> Generates the raw waveform at a specific frequency.</p>
         <p><strong>Gain Node:</strong> Controls volume and implements the ADSR envelope.</p>
-        <p><strong>Audio Graph:</strong> Oscillator → Gain → Destination (speakers)</p>
+        <p><strong>Audio Graph:</strong> Oscillator → Gain → Master Gain → Compressor → Destination (speakers)</p>
+        <p><strong>AudioWorklet:</strong> Where supported, a custom synth renders the same graph in JavaScript on the audio thread.</p>
         <br>
         <p><strong>ADSR Envelope:</strong></p>
         <ul>
@@ -216,212 +263,974 @@ audio_component_html = f"""
         </ul>
     </div>
 
+    <!-- AudioWorklet synth, loaded by initAudioContext() through a Blob URL.
+         Browsers don't run scripts of this type on the page itself. -->
+    <script type="text/worklet" id="mulberry-synth">
+        // Runs on the audio rendering thread, in the AudioWorkletGlobalScope
+        // (sampleRate and currentFrame are globals there)
+        const MAX_VOICES = 16;
+        const TWO_PI = 2 * Math.PI;
+        const INV_TWO_PI = 1 / TWO_PI;
+
+        // One sine cycle as a lookup table, shared by every voice; read with
+        // linear interpolation instead of calling Math.sin() per sample
+        const SIN_TABLE_SIZE = 4096;
+        const SIN_TABLE_MASK = SIN_TABLE_SIZE - 1;
+        const SIN_SCALE = SIN_TABLE_SIZE / TWO_PI; // Radians to table index
+        const SIN_TABLE = new Float32Array(SIN_TABLE_SIZE);
+        for (let i = 0; i < SIN_TABLE_SIZE; i++) {
+            SIN_TABLE[i] = Math.sin(TWO_PI * i / SIN_TABLE_SIZE);
+        }
+
+        // Envelope stages, in order
+        const STAGE_ATTACK = 0;
+        const STAGE_DECAY = 1;
+        const STAGE_HOLD = 2;
+        const STAGE_RELEASE = 3;
+        const STAGE_DONE = 4;
+
+        // Must match ENVELOPE_FLOOR in the main script
+        const ENVELOPE_FLOOR = 1e-4;
+
+        /**
+         * PolyBLEP correction that smooths a waveform's jump at t = 0
+         * t and dt are in cycles (0..1), dt being the phase increment per sample
+         */
+        function polyBlep(t, dt) {
+            if (t < dt) {
+                t /= dt;
+                return t + t - t * t - 1;
+            }
+            if (t > 1 - dt) {
+                t = (t - 1) / dt;
+                return t * t + t + t + 1;
+            }
+            return 0;
+        }
+
+        class MulberrySynth extends AudioWorkletProcessor {
+            constructor(options) {
+                super();
+                // Everything process() touches is allocated here, up-front,
+                // so rendering never allocates and never triggers GC
+                this.scratch = new Float32Array(128);
+                this.voices = new Array(MAX_VOICES).fill(null).map(() => ({
+                    active: false,
+                    startFrame: 0,
+                    waveform: 'sine',
+                    phase: 0,
+                    phaseInc: 0,
+                    peak: 0,
+                    sustain: 0,
+                    attackSamples: 0,
+                    decaySamples: 0,
+                    holdSamples: 0,
+                    releaseSamples: 0,
+                    stage: STAGE_DONE,
+                    stageLeft: 0,
+                    env: 0,
+                    envRatio: 1,
+                    envStep: 0
+                }));
+                this.port.onmessage = (event) => {
+                    if (event.data.type === 'noteOn') {
+                        this.noteOn(event.data);
+                    }
+                };
+                // Notes can also come with the node itself (the pre-rendered
+                // scale), so they're all queued before the first block
+                const notes = options.processorOptions && options.processorOptions.notes;
+                if (notes) {
+                    notes.forEach((note) => this.noteOn(note));
+                }
+            }
+
+            /**
+             * Start a voice for a note; times in the message are in seconds
+             */
+            noteOn(note) {
+                let voice = this.voices.find((v) => !v.active);
+                if (!voice) {
+                    // All voices busy - steal the one that started first
+                    voice = this.voices.reduce((a, b) => (a.startFrame <= b.startFrame ? a : b));
+                    this.port.postMessage({ type: 'noteEnded' });
+                }
+                voice.active = true;
+                voice.startFrame = Math.round(note.when * sampleRate);
+                voice.waveform = note.waveform;
+                voice.phase = 0;
+                voice.phaseInc = TWO_PI * note.frequency / sampleRate;
+                voice.peak = note.peak;
+                voice.sustain = Math.max(note.sustain, ENVELOPE_FLOOR);
+                voice.attackSamples = Math.round(note.attack * sampleRate);
+                voice.decaySamples = Math.round(note.decay * sampleRate);
+                voice.holdSamples = Math.round(note.hold * sampleRate);
+                voice.releaseSamples = Math.round(note.release * sampleRate);
+                voice.stage = STAGE_ATTACK;
+                voice.stageLeft = voice.attackSamples;
+                voice.env = 0;
+                voice.envRatio = 1;
+                voice.envStep = note.peak / (voice.attackSamples || 1);
+            }
+
+            /**
+             * Move a voice on to its next envelope stage, skipping empty stages
+             * Attack is a linear ramp (envStep); decay and release are
+             * exponential (envRatio). Each stage starts exactly on its target
+             * level, so rounding never accumulates across stages
+             */
+            nextStage(voice) {
+                while (voice.stageLeft === 0) {
+                    voice.stage++;
+                    if (voice.stage === STAGE_DECAY) {
+                        voice.env = voice.peak;
+                        voice.stageLeft = voice.decaySamples;
+                        voice.envRatio = Math.pow(voice.sustain / voice.peak, 1 / (voice.decaySamples || 1));
+                        voice.envStep = 0;
+                    } else if (voice.stage === STAGE_HOLD) {
+                        voice.env = voice.sustain;
+                        voice.stageLeft = voice.holdSamples;
+                        voice.envRatio = 1;
+                        voice.envStep = 0;
+                    } else if (voice.stage === STAGE_RELEASE) {
+                        voice.env = voice.sustain;
+                        voice.stageLeft = voice.releaseSamples;
+                        voice.envRatio = Math.pow(ENVELOPE_FLOOR / voice.sustain, 1 / (voice.releaseSamples || 1));
+                        voice.envStep = 0;
+                    } else {
+                        voice.active = false;
+                        voice.env = 0;
+                        this.port.postMessage({ type: 'noteEnded' });
+                        return;
+                    }
+                }
+            }
+
+            /**
+             * Write the voice's raw waveform into buffer[start..end)
+             * The waveform is chosen once per block, not once per sample
+             */
+            renderOscillator(voice, buffer, start, end) {
+                const inc = voice.phaseInc;
+                const dt = inc * INV_TWO_PI;
+                let phase = voice.phase;
+                switch (voice.waveform) {
+                    case 'square':
+                        for (let i = start; i < end; i++) {
+                            const t = phase * INV_TWO_PI;
+                            const half = t < 0.5 ? t + 0.5 : t - 0.5;
+                            buffer[i] = (t < 0.5 ? 1 : -1) + polyBlep(t, dt) - polyBlep(half, dt);
+                            phase += inc;
+                            if (phase >= TWO_PI) phase -= TWO_PI;
+                        }
+                        break;
+                    case 'sawtooth':
+                        for (let i = start; i < end; i++) {
+                            const t = phase * INV_TWO_PI;
+                            buffer[i] = 2 * t - 1 - polyBlep(t, dt);
+                            phase += inc;
+                            if (phase >= TWO_PI) phase -= TWO_PI;
+                        }
+                        break;
+                    case 'triangle':
+                        for (let i = start; i < end; i++) {
+                            const t = phase * INV_TWO_PI;
+                            buffer[i] = 1 - 4 * Math.abs(t - 0.5);
+                            phase += inc;
+                            if (phase >= TWO_PI) phase -= TWO_PI;
+                        }
+                        break;
+                    default:
+                        for (let i = start; i < end; i++) {
+                            const index = phase * SIN_SCALE;
+                            const i0 = index | 0;
+                            const frac = index - i0;
+                            buffer[i] = SIN_TABLE[i0 & SIN_TABLE_MASK] * (1 - frac)
+                                      + SIN_TABLE[(i0 + 1) & SIN_TABLE_MASK] * frac;
+                            phase += inc;
+                            if (phase >= TWO_PI) phase -= TWO_PI;
+                        }
+                }
+                voice.phase = phase;
+            }
+
+            /**
+             * Apply the voice's envelope to buffer[start..end) and mix it into output
+             * Works one envelope stage at a time, so the per-sample loop is a
+             * flat multiply-add with no branches and its state in locals
+             */
+            renderEnvelope(voice, buffer, output, start, end) {
+                let i = start;
+                while (i < end) {
+                    if (voice.stageLeft === 0) {
+                        this.nextStage(voice);
+                        if (!voice.active) {
+                            return;
+                        }
+                    }
+                    const stop = Math.min(end, i + voice.stageLeft);
+                    const ratio = voice.envRatio;
+                    const step = voice.envStep;
+                    let env = voice.env;
+                    voice.stageLeft -= stop - i;
+                    for (; i < stop; i++) {
+                        output[i] += buffer[i] * env;
+                        env = env * ratio + step;
+                    }
+                    voice.env = env;
+                }
+            }
+
+            process(inputs, outputs) {
+                const output = outputs[0][0];
+                const blockLength = output.length;
+                for (let v = 0; v < MAX_VOICES; v++) {
+                    const voice = this.voices[v];
+                    if (!voice.active) {
+                        continue;
+                    }
+                    // Voices scheduled for later start part-way into a future block
+                    const offset = voice.startFrame - currentFrame;
+                    if (offset >= blockLength) {
+                        continue;
+                    }
+                    const start = offset > 0 ? offset : 0;
+                    this.renderOscillator(voice, this.scratch, start, blockLength);
+                    this.renderEnvelope(voice, this.scratch, output, start, blockLength);
+                }
+                // Keep the processor alive; idle blocks are just silence
+                return true;
+            }
+        }
+
+        registerProcessor('mulberry-synth', MulberrySynth);
+    </script>
+
     <script>
         // Global audio context - created once and reused
         // The AudioContext is the foundation of Web Audio API
         let audioContext = null;
 
-        // Parameters from Streamlit (passed via template)
-        const frequency = {frequency};
-        const waveform = "{waveform}";
-        const attack = {attack};
-        const decay = {decay};
-        const sustain = {sustain};
-        const release = {release};
+        // AudioContext constructor, with the prefixed fallback resolved once
+        const AudioCtx = window.AudioContext || window.webkitAudioContext;
+
+        // Shared output chain: every voice → masterGain → compressor → destination
+        // One edge into the destination, and the compressor keeps overlapping
+        // notes from clipping
+        const MASTER_VOLUME = 0.8;
+        let masterGain = null;
+        let compressor = null;
+
+        // Parameters from Streamlit, filled in by the #params script at the end
+        // of the document. Always read at call time, never captured in consts.
+        window.mulberryParams = window.mulberryParams || {};
+
+        // The AudioWorklet synth node, once its module has loaded; until then
+        // (or if the browser has no AudioWorklet) notes use native nodes
+        let synthNode = null;
+        // Blob URL of the synth module, so offline renders can load it too
+        let synthModuleUrl = null;
+
+        // How long a tone is held at the sustain level before its release
+        const SUSTAIN_HOLD = 0.5;
+
+        // Decay and release are exponential and can't reach 0, so they stop at
+        // this floor (-80 dB, well above the denormal range) and then cut to 0
+        const ENVELOPE_FLOOR = 1e-4;
+
+        // Scale notes: fixed duration and a simple envelope
+        const SCALE_NOTE_DURATION = 0.3; // Duration of each note in seconds
+        const SCALE_LEVEL = 0.5;
+        const SCALE_QUICK_ATTACK = 0.01; // Quick attack for crisp notes
+        const SCALE_QUICK_RELEASE = 0.05; // Quick release
+
+        // Pre-rendered ADSR curves, keyed by the envelope settings and sample rate,
+        // so repeated presses of "Play Tone" reuse the same Float32Array
+        const envelopeCache = new Map();
+
+        // Pre-rendered C-Major scales (promises of AudioBuffers), keyed by
+        // waveform and sample rate; the oldest entry is dropped beyond the limit
+        const SCALE_CACHE_SIZE = 8;
+        const scaleCache = new Map();
+
+        // Node pools, so playing a note does not allocate on the hot path.
+        // GainNodes are reused between notes; OscillatorNodes can only be
+        // started once, so spare ones are created ahead of time instead.
+        const GAIN_POOL_SIZE = 16;
+        const OSCILLATOR_POOL_SIZE = 16;
+        const gainPool = [];
+        const oscillatorPool = [];
+
+        // C-Major scale frequencies (C4 to C5)
+        // These are calculated using the 12-tone equal temperament formula:
+        // f(n) = f0 * 2^(n/12), where f0 is a reference frequency
+        // Built once at load time, not on every playCMajorScale() call
+        const C_MAJOR_FREQS = new Float32Array([
+            261.63, // C4
+            293.66, // D4
+            329.63, // E4
+            349.23, // F4
+            392.00, // G4
+            440.00, // A4
+            493.88, // B4
+            523.25  // C5 (octave)
+        ]);
+
+        const C_MAJOR_NAMES = ['C4', 'D4', 'E4', 'F4', 'G4', 'A4', 'B4', 'C5'];
+
+        // Pre-built status messages, e.g. "Playing C4 (261.63Hz)", so following
+        // the scale passes the same ready-made strings to updateStatus()
+        const SCALE_MSGS = C_MAJOR_NAMES.map((name, i) => `Playing ${name} (${C_MAJOR_FREQS[i].toFixed(2)}Hz)`);
+
+        // One PeriodicWave per waveform type, built once in initAudioContext()
+        // and shared by every oscillator (sine uses the native type)
+        let waveCache = null;
+
+        // Idle suspend - a running but silent AudioContext still costs CPU, so
+        // it is suspended shortly after the last playing voice has ended
+        const IDLE_SUSPEND_DELAY = 500; // ms
+        let activeVoices = 0;
+        let suspendTimer = null;
+        let suspendPending = false;
 
         /**
          * Initialize Audio Context
          * Must be called after a user gesture (button click) to comply with browser autoplay policies
          */
-        function initAudioContext() {{
-            if (!audioContext) {{
+        function initAudioContext() {
+            if (!audioContext) {
                 // Create the AudioContext - this is our audio processing engine
-                audioContext = new (window.AudioContext || window.webkitAudioContext)();
+                audioContext = new AudioCtx();
+                
+                // Fill the node pools once, right after the context exists
+                for (let i = 0; i < GAIN_POOL_SIZE; i++) {
+                    gainPool.push(audioContext.createGain());
+                }
+                for (let i = 0; i < OSCILLATOR_POOL_SIZE; i++) {
+                    oscillatorPool.push(audioContext.createOscillator());
+                }
+                
+                // Build the shared output chain; the compressor is set up as a
+                // limiter, so it leaves single notes alone and only catches peaks
+                masterGain = audioContext.createGain();
+                masterGain.gain.value = MASTER_VOLUME;
+                compressor = audioContext.createDynamicsCompressor();
+                compressor.threshold.value = -6; // dB
+                compressor.knee.value = 6; // dB
+                compressor.ratio.value = 12;
+                compressor.attack.value = 0.003; // s
+                compressor.release.value = 0.25; // s
+                masterGain.connect(compressor).connect(audioContext.destination);
+                
+                // Build the wavetables once, instead of once per note
+                waveCache = {
+                    sine: null,
+                    square: buildPeriodicWave(audioContext, 'square'),
+                    sawtooth: buildPeriodicWave(audioContext, 'sawtooth'),
+                    triangle: buildPeriodicWave(audioContext, 'triangle')
+                };
+                
+                loadSynthWorklet();
                 showStatus('Audio context initialized');
-            }}
-            // Resume if suspended (browser autoplay policy)
-            if (audioContext.state === 'suspended') {{
+            }
+            // Cancel a pending idle suspend - we're about to play again
+            clearTimeout(suspendTimer);
+            suspendTimer = null;
+            // Resume if suspended (browser autoplay policy or idle suspend), or
+            // if an idle suspend is still in flight - state only turns
+            // 'suspended' once it settles, so checking state alone misses it
+            if (audioContext.state === 'suspended' || suspendPending) {
                 audioContext.resume();
-            }}
-        }}
+            }
+        }
+
+        /**
+         * Load the AudioWorklet synth from the #mulberry-synth script
+         * Loading is asynchronous; notes played before it's ready use native nodes
+         */
+        function loadSynthWorklet() {
+            if (!audioContext.audioWorklet) {
+                return; // No AudioWorklet support (e.g. not a secure context)
+            }
+            const source = document.getElementById('mulberry-synth').textContent;
+            const moduleUrl = URL.createObjectURL(new Blob([source], { type: 'application/javascript' }));
+            audioContext.audioWorklet.addModule(moduleUrl).then(() => {
+                const node = new AudioWorkletNode(audioContext, 'mulberry-synth', {
+                    numberOfInputs: 0,
+                    outputChannelCount: [1]
+                });
+                node.port.onmessage = (event) => {
+                    if (event.data.type === 'noteEnded') {
+                        voiceEnded();
+                    }
+                };
+                node.connect(masterGain);
+                synthNode = node;
+                synthModuleUrl = moduleUrl;
+            }).catch((error) => {
+                console.warn('AudioWorklet synth unavailable, using oscillator nodes', error);
+            });
+        }
+
+        /**
+         * Build a note message for the AudioWorklet synth
+         * All times are in seconds; `when` is on the clock of the context the
+         * synth runs in
+         */
+        function makeNote(when, frequency, waveform, peak, attack, decay, sustain, hold, release) {
+            return { type: 'noteOn', when, frequency, waveform, peak, attack, decay, sustain, hold, release };
+        }
+
+        /**
+         * Build the synth note for one note of a scale, with the quick scale envelope
+         */
+        function makeScaleNote(freq, startTime, duration, waveform) {
+            return makeNote(startTime, freq, waveform, SCALE_LEVEL, SCALE_QUICK_ATTACK, 0, SCALE_LEVEL,
+                            duration - SCALE_QUICK_ATTACK - SCALE_QUICK_RELEASE, SCALE_QUICK_RELEASE);
+        }
+
+        /**
+         * Send a note to the live AudioWorklet synth
+         */
+        function noteOn(note) {
+            synthNode.port.postMessage(note);
+            activeVoices++;
+        }
+
+        /**
+         * Build a PeriodicWave for a waveform type on the given context (live or
+         * offline) from its Fourier series
+         * The series is truncated at the last harmonic below the Nyquist
+         * frequency for the lowest note we play (minFrequency, the bottom of
+         * the frequency slider, from Streamlit), so no harmonic is wasted:
+         * - square:   4/(πn) for odd n
+         * - sawtooth: 2/(πn), alternating sign
+         * - triangle: 8/(π²n²) for odd n, alternating sign
+         */
+        function buildPeriodicWave(context, type) {
+            const harmonics = Math.floor(context.sampleRate / 2 / window.mulberryParams.minFrequency);
+            const real = new Float32Array(harmonics + 1);
+            const imag = new Float32Array(harmonics + 1);
+            for (let n = 1; n <= harmonics; n++) {
+                if (type === 'square') {
+                    imag[n] = n % 2 ? 4 / (Math.PI * n) : 0;
+                } else if (type === 'sawtooth') {
+                    imag[n] = (n % 2 ? 2 : -2) / (Math.PI * n);
+                } else if (type === 'triangle') {
+                    imag[n] = n % 2 ? (n % 4 === 1 ? 8 : -8) / (Math.PI * Math.PI * n * n) : 0;
+                }
+            }
+            return context.createPeriodicWave(real, imag, { disableNormalization: false });
+        }
+
+        /**
+         * Set an oscillator's waveform from the shared wavetable cache
+         */
+        function applyWaveform(oscillator, waveform) {
+            const wave = waveCache[waveform];
+            if (wave) {
+                oscillator.setPeriodicWave(wave);
+            } else {
+                oscillator.type = 'sine';
+            }
+        }
+
+        /**
+         * Take nodes from the pools, falling back to a new node if a pool is empty
+         */
+        function acquireGain() {
+            return gainPool.pop() || audioContext.createGain();
+        }
+
+        function acquireOscillator() {
+            return oscillatorPool.pop() || audioContext.createOscillator();
+        }
+
+        /**
+         * Return a finished voice to the pools
+         * Called from oscillator.onended, once the scheduled stop has happened
+         */
+        function releaseVoice(oscillator, gainNode) {
+            oscillator.onended = null; // Guards against releasing a voice twice
+            oscillator.disconnect();
+            gainNode.disconnect();
+            gainNode.gain.cancelScheduledValues(0);
+            if (gainPool.length < GAIN_POOL_SIZE) {
+                gainPool.push(gainNode);
+            }
+            // A stopped oscillator can't be restarted, so replace it with a
+            // fresh one now, while nothing is waiting to be played
+            if (oscillatorPool.length < OSCILLATOR_POOL_SIZE) {
+                oscillatorPool.push(audioContext.createOscillator());
+            }
+            voiceEnded();
+        }
+
+        /**
+         * Count a voice (native nodes, buffer source or worklet) as finished
+         * Called from the audio clock's end-of-playback events (onended or
+         * the worklet's noteEnded message); once nothing is left playing it
+         * hides the status and suspends the context
+         */
+        function voiceEnded() {
+            if (activeVoices > 0 && --activeVoices === 0) {
+                hideStatus();
+                suspendTimer = setTimeout(suspendIdleContext, IDLE_SUSPEND_DELAY);
+            }
+        }
+        function suspendIdleContext() {
+            suspendTimer = null;
+            suspendPending = true;
+            audioContext.suspend().then(() => { suspendPending = false; });
+        }
+
+        /**
+         * Fill curve[offset..offset + length) with an exponential ramp from
+         * `from` to `to` (both above 0), one multiply per sample by a
+         * precomputed ratio. Exponential ramps sound natural to our
+         * logarithmic hearing and never creep into denormal values near 0.
+         */
+        function fillExponentialRamp(curve, offset, length, from, to) {
+            const ratio = Math.pow(to / from, 1 / length);
+            let value = from;
+            for (let i = 0; i < length; i++) {
+                curve[offset + i] = value;
+                value *= ratio;
+            }
+        }
+
+        /**
+         * Build the whole ADSR envelope as one Float32Array of gain values
+         * (one value per sample), so the gain node needs a single
+         * setValueCurveAtTime() event instead of a chain of ramps.
+         * Each segment is filled by its own branch-free loop: a linear attack
+         * using a precomputed reciprocal instead of a division per sample,
+         * exponential decay and release, and a plain fill() for the sustain.
+         */
+        function buildAdsrCurve(attack, decay, sustain, release, sampleRate) {
+            const key = `${attack}_${decay}_${sustain}_${release}_${sampleRate}`;
+            const cached = envelopeCache.get(key);
+            if (cached) {
+                return cached;
+            }
+
+            const attackSamples = Math.max(1, Math.round(attack * sampleRate));
+            const decaySamples = Math.max(1, Math.round(decay * sampleRate));
+            const holdSamples = Math.round(SUSTAIN_HOLD * sampleRate);
+            const releaseSamples = Math.max(1, Math.round(release * sampleRate));
+            const invAttack = 1 / attackSamples;
+            const sustainLevel = Math.max(sustain, ENVELOPE_FLOOR);
+
+            // One extra sample so the curve ends exactly at silence
+            const curve = new Float32Array(attackSamples + decaySamples + holdSamples + releaseSamples + 1);
+            let offset = 0;
+
+            // ATTACK: Ramp up from silence to full volume (1.0)
+            for (let i = 0; i < attackSamples; i++) {
+                curve[offset + i] = i * invAttack;
+            }
+            offset += attackSamples;
+
+            // DECAY: Fall exponentially from full volume to the sustain level
+            fillExponentialRamp(curve, offset, decaySamples, 1.0, sustainLevel);
+            offset += decaySamples;
+
+            // SUSTAIN: Hold at the sustain level
+            curve.fill(sustainLevel, offset, offset + holdSamples);
+            offset += holdSamples;
+
+            // RELEASE: Fall exponentially from the sustain level to the floor
+            fillExponentialRamp(curve, offset, releaseSamples, sustainLevel, ENVELOPE_FLOOR);
+            // The final sample is already 0 (Float32Array is zero-filled)
+
+            envelopeCache.set(key, curve);
+            return curve;
+        }
+
+        /**
+         * Build the simple envelope used by every note of the C-Major scale:
+         * a quick attack to half volume, a hold, and a quick release.
+         * It only depends on the note duration, so the whole scale shares one
+         * cached curve.
+         */
+        function buildScaleNoteCurve(duration, sampleRate) {
+            const key = `scale_${duration}_${sampleRate}`;
+            const cached = envelopeCache.get(key);
+            if (cached) {
+                return cached;
+            }
+
+            const level = SCALE_LEVEL;
+            const attackSamples = Math.max(1, Math.round(SCALE_QUICK_ATTACK * sampleRate));
+            const releaseSamples = Math.max(1, Math.round(SCALE_QUICK_RELEASE * sampleRate));
+            const holdSamples = Math.max(0, Math.round(duration * sampleRate) - attackSamples - releaseSamples);
+            const invAttack = 1 / attackSamples;
+
+            // One extra sample so the curve ends exactly at silence
+            const curve = new Float32Array(attackSamples + holdSamples + releaseSamples + 1);
+            let offset = 0;
+            for (let i = 0; i < attackSamples; i++) {
+                curve[offset + i] = level * i * invAttack;
+            }
+            offset += attackSamples;
+            curve.fill(level, offset, offset + holdSamples);
+            offset += holdSamples;
+            fillExponentialRamp(curve, offset, releaseSamples, level, ENVELOPE_FLOOR);
+
+            envelopeCache.set(key, curve);
+            return curve;
+        }
 
         /**
          * Play a single tone with ADSR envelope
-         * This demonstrates the core Web Audio API pattern:
-         * 1. Create oscillator (sound source)
-         * 2. Create gain node (volume control)
-         * 3. Connect nodes: oscillator → gain → destination
-         * 4. Apply ADSR envelope to gain
-         * 5. Start and stop oscillator
+         * Uses the AudioWorklet synth when it's loaded, native nodes otherwise
          */
-        function playTone() {{
+        function playTone() {
             // Initialize audio context on first user interaction
             initAudioContext();
             
+            // Read the current settings from Streamlit
+            const { frequency, waveform, attack, decay, sustain, release } = window.mulberryParams;
+            
             // Get current time from audio context for precise timing
             const now = audioContext.currentTime;
             
-            // Create oscillator node - this generates the actual sound wave
-            const oscillator = audioContext.createOscillator();
-            oscillator.type = waveform; // Set waveform type (sine, square, etc.)
+            if (synthNode) {
+                // The synth renders the whole voice (oscillator and ADSR
+                // envelope) on the audio thread from this one message
+                noteOn(makeNote(now, frequency, waveform, 1.0, attack, decay, sustain, SUSTAIN_HOLD, release));
+            } else {
+                playToneWithNodes(frequency, waveform, attack, decay, sustain, release, now);
+            }
+            
+            // Show status (hidden by voiceEnded() once the sound completes)
+            showStatus(`Playing ${frequency}Hz ${waveform} tone with ADSR envelope`);
+        }
+
+        /**
+         * Play a single tone with ADSR envelope using native nodes
+         * This demonstrates the core Web Audio API pattern:
+         * 1. Create oscillator (sound source)
+         * 2. Create gain node (volume control)
+         * 3. Connect nodes: oscillator → gain → master output → destination
+         * 4. Apply ADSR envelope to gain
+         * 5. Start and stop oscillator
+         */
+        function playToneWithNodes(frequency, waveform, attack, decay, sustain, release, now) {
+            // Take an oscillator node from the pool - this generates the actual sound wave
+            const oscillator = acquireOscillator();
+            applyWaveform(oscillator, waveform); // Set waveform type (sine, square, etc.)
             oscillator.frequency.setValueAtTime(frequency, now); // Set frequency in Hz
             
-            // Create gain node - controls volume (amplitude)
-            const gainNode = audioContext.createGain();
+            // Take a gain node from the pool - controls volume (amplitude)
+            const gainNode = acquireGain();
             
-            // Connect the audio graph: oscillator → gain → destination (speakers)
+            // Connect the audio graph: oscillator → gain → master output (speakers)
             oscillator.connect(gainNode);
-            gainNode.connect(audioContext.destination);
-            
-            // Calculate total note duration
-            const noteDuration = attack + decay + 0.5; // Hold for 0.5s at sustain level
+            gainNode.connect(masterGain);
             
             // Apply ADSR envelope to gain node
-            // This creates the volume shape over time
-            
-            // Start at 0 (silence)
-            gainNode.gain.setValueAtTime(0, now);
-            
-            // ATTACK: Ramp up to full volume (1.0)
-            gainNode.gain.linearRampToValueAtTime(1.0, now + attack);
-            
-            // DECAY: Ramp down to sustain level
-            gainNode.gain.linearRampToValueAtTime(sustain, now + attack + decay);
-            
-            // SUSTAIN: Hold at sustain level (implicit - just wait)
-            // The sustain value is maintained automatically
-            
-            // RELEASE: Start ramp down to silence after note duration
-            gainNode.gain.setValueAtTime(sustain, now + noteDuration);
-            gainNode.gain.linearRampToValueAtTime(0, now + noteDuration + release);
+            // The pre-rendered curve holds the whole volume shape over time
+            // (attack, decay, sustain hold and release) in one automation event
+            const sampleRate = audioContext.sampleRate;
+            const envelope = buildAdsrCurve(attack, decay, sustain, release, sampleRate);
+            const totalDuration = (envelope.length - 1) / sampleRate;
+            gainNode.gain.setValueCurveAtTime(envelope, now, totalDuration);
             
             // Start the oscillator
             oscillator.start(now);
             
             // Stop the oscillator after release phase completes
-            oscillator.stop(now + noteDuration + release);
-            
-            // Show status
-            showStatus(`Playing {frequency}Hz {waveform} tone with ADSR envelope`);
-            
-            // Hide status after sound completes
-            setTimeout(() => {{
-                hideStatus();
-            }}, (noteDuration + release) * 1000 + 500);
-        }}
+            oscillator.stop(now + totalDuration);
+            oscillator.onended = () => releaseVoice(oscillator, gainNode);
+            activeVoices++;
+        }
 
         /**
          * Play C-Major scale (C, D, E, F, G, A, B, C)
          * Demonstrates sequencing multiple tones
          * Frequencies are based on equal temperament tuning starting from C4 (261.63 Hz)
+         * The scale only depends on the waveform, so it is rendered once per
+         * waveform into an AudioBuffer and replayed from there, by the same
+         * engine that plays the live tone; if offline rendering isn't
+         * available or fails, the notes are scheduled live instead
          */
-        function playCMajorScale() {{
+        function playCMajorScale() {
             initAudioContext();
             
-            // C-Major scale frequencies (C4 to C5)
-            // These are calculated using the 12-tone equal temperament formula:
-            // f(n) = f0 * 2^(n/12), where f0 is a reference frequency
-            const cMajorScale = [
-                261.63, // C4
-                293.66, // D4
-                329.63, // E4
-                349.23, // F4
-                392.00, // G4
-                440.00, // A4
-                493.88, // B4
-                523.25  // C5 (octave)
-            ];
+            showStatus('Playing C-Major scale...');
+            
+            if (!window.OfflineAudioContext) {
+                scheduleScale(audioContext.currentTime);
+                return;
+            }
+            // Count the scale as playing while it renders, so a voice ending in
+            // the meantime doesn't hide the status or suspend the context;
+            // playScaleBuffer() takes this count over
+            activeVoices++;
+            getScaleBuffer(window.mulberryParams.waveform).then(playScaleBuffer, (error) => {
+                console.warn('Could not pre-render the scale, playing it live', error);
+                // Schedule the live notes before dropping the pending count, so
+                // it never passes through 0 in between
+                scheduleScale(audioContext.currentTime);
+                voiceEnded();
+            });
+        }
+
+        /**
+         * Get the pre-rendered scale for a waveform, rendering it on first use
+         * The promise itself is cached, so quick repeated presses share one render;
+         * the key includes the engine, so a scale rendered with native nodes
+         * before the synth loaded is re-rendered with the synth afterwards
+         */
+        function getScaleBuffer(waveform) {
+            const engine = synthModuleUrl ? 'synth' : 'nodes';
+            const key = `${engine}_${waveform}_${audioContext.sampleRate}`;
+            let buffer = scaleCache.get(key);
+            if (!buffer) {
+                if (scaleCache.size >= SCALE_CACHE_SIZE) {
+                    scaleCache.delete(scaleCache.keys().next().value);
+                }
+                buffer = renderScale(waveform);
+                buffer.catch(() => scaleCache.delete(key));
+                scaleCache.set(key, buffer);
+            }
+            return buffer;
+        }
+
+        /**
+         * Render the whole scale into one AudioBuffer with an OfflineAudioContext
+         * Same notes and envelope as playNoteInScale(), wired into a context
+         * that renders as fast as it can instead of in real time. Once the live
+         * tone uses the AudioWorklet synth, the scale is rendered by the synth
+         * too; until then it uses the same native nodes as the live tone
+         */
+        function renderScale(waveform) {
+            const sampleRate = audioContext.sampleRate;
+            const noteCount = C_MAJOR_FREQS.length;
+            const offline = new OfflineAudioContext(1, Math.ceil(noteCount * SCALE_NOTE_DURATION * sampleRate), sampleRate);
+            if (synthModuleUrl && offline.audioWorklet) {
+                return renderScaleWithSynth(offline, waveform);
+            }
+            const envelope = buildScaleNoteCurve(SCALE_NOTE_DURATION, sampleRate);
+            
+            // PeriodicWaves belong to the context that built them, so build the
+            // same wavetable as the live tone on the offline context (sine uses
+            // the native type, as in applyWaveform())
+            const wave = waveform === 'sine' ? null : buildPeriodicWave(offline, waveform);
             
-            const noteNames = ['C4', 'D4', 'E4', 'F4', 'G4', 'A4', 'B4', 'C5'];
-            const noteDuration = 0.3; // Duration of each note in seconds
+            for (let index = 0; index < noteCount; index++) {
+                const startTime = index * SCALE_NOTE_DURATION;
+                
+                const oscillator = offline.createOscillator();
+                if (wave) {
+                    oscillator.setPeriodicWave(wave);
+                }
+                oscillator.frequency.setValueAtTime(C_MAJOR_FREQS[index], startTime);
+                
+                const gainNode = offline.createGain();
+                gainNode.gain.setValueCurveAtTime(envelope, startTime, SCALE_NOTE_DURATION);
+                
+                oscillator.connect(gainNode);
+                gainNode.connect(offline.destination);
+                oscillator.start(startTime);
+                oscillator.stop(startTime + SCALE_NOTE_DURATION);
+            }
             
-            showStatus('Playing C-Major scale...');
+            return offline.startRendering();
+        }
+
+        /**
+         * Render the scale with the AudioWorklet synth on an offline context
+         * The notes are handed to the synth with the node rather than over its
+         * port, so none can arrive after rendering has started
+         */
+        function renderScaleWithSynth(offline, waveform) {
+            const notes = Array.from(C_MAJOR_FREQS, (freq, index) =>
+                makeScaleNote(freq, index * SCALE_NOTE_DURATION, SCALE_NOTE_DURATION, waveform));
+            return offline.audioWorklet.addModule(synthModuleUrl).then(() => {
+                const node = new AudioWorkletNode(offline, 'mulberry-synth', {
+                    numberOfInputs: 0,
+                    outputChannelCount: [1],
+                    processorOptions: { notes }
+                });
+                node.connect(offline.destination);
+                return offline.startRendering();
+            });
+        }
+
+        /**
+         * Play a pre-rendered scale: one buffer source instead of eight voices
+         * The voice was already counted by playCMajorScale() while rendering
+         */
+        function playScaleBuffer(buffer) {
+            const source = audioContext.createBufferSource();
+            source.buffer = buffer;
+            source.connect(masterGain);
             
-            // Schedule each note in the scale
-            cMajorScale.forEach((freq, index) => {{
-                // Use setTimeout to schedule each note
-                // We add a small delay (index * noteDuration * 1000) for each note
-                setTimeout(() => {{
-                    playNoteInScale(freq, noteDuration, noteNames[index]);
-                }}, index * noteDuration * 1000);
-            }});
+            const t0 = audioContext.currentTime;
+            source.start(t0);
+            source.onended = () => {
+                source.disconnect();
+                voiceEnded();
+            };
             
-            // Hide status after scale completes
-            const totalDuration = cMajorScale.length * noteDuration;
-            setTimeout(() => {{
-                hideStatus();
-            }}, totalDuration * 1000 + 500);
-        }}
+            followScale(t0);
+        }
 
         /**
-         * Play a single note in a scale
+         * Schedule every note in the scale up-front on the AudioContext clock
+         * Each note starts at t0 + index * SCALE_NOTE_DURATION, so the timing
+         * is sample-accurate and doesn't depend on main-thread timers
+         */
+        function scheduleScale(t0) {
+            for (let index = 0; index < C_MAJOR_FREQS.length; index++) {
+                playNoteInScale(C_MAJOR_FREQS[index], t0 + index * SCALE_NOTE_DURATION, SCALE_NOTE_DURATION);
+            }
+            followScale(t0);
+        }
+
+        /**
+         * Follow a scale that started at t0, for the status display only
+         * Reads the AudioContext clock once per animation frame
+         */
+        function followScale(t0) {
+            let lastIndex = -1;
+            function frame() {
+                const index = Math.floor((audioContext.currentTime - t0) / SCALE_NOTE_DURATION);
+                if (index >= C_MAJOR_FREQS.length) {
+                    return;
+                }
+                if (index >= 0 && index !== lastIndex) {
+                    lastIndex = index;
+                    updateStatus(SCALE_MSGS[index]);
+                }
+                requestAnimationFrame(frame);
+            }
+            requestAnimationFrame(frame);
+        }
+
+        /**
+         * Schedule a single note of a scale at startTime (AudioContext time)
          * Similar to playTone but with fixed duration and simpler envelope
+         * @param {number} freq - Note frequency in Hz
+         * @param {number} startTime - Start time in seconds, on the AudioContext clock
+         * @param {number} duration - Note duration in seconds
          */
-        function playNoteInScale(freq, duration, noteName) {{
-            const now = audioContext.currentTime;
+        function playNoteInScale(freq, startTime, duration) {
+            if (synthNode) {
+                noteOn(makeScaleNote(freq, startTime, duration, window.mulberryParams.waveform));
+                return;
+            }
             
-            // Create oscillator with the specified frequency
-            const oscillator = audioContext.createOscillator();
-            oscillator.type = waveform;
-            oscillator.frequency.setValueAtTime(freq, now);
+            // Take an oscillator from the pool and set the specified frequency
+            const oscillator = acquireOscillator();
+            applyWaveform(oscillator, window.mulberryParams.waveform);
+            oscillator.frequency.setValueAtTime(freq, startTime);
             
-            // Create gain node with simplified envelope for scale
-            const gainNode = audioContext.createGain();
+            // Take a gain node from the pool, with simplified envelope for scale
+            const gainNode = acquireGain();
             oscillator.connect(gainNode);
-            gainNode.connect(audioContext.destination);
-            
-            // Simple envelope for scale notes
-            const quickAttack = 0.01; // Quick attack for crisp notes
-            const quickRelease = 0.05; // Quick release
+            gainNode.connect(masterGain);
             
-            gainNode.gain.setValueAtTime(0, now);
-            gainNode.gain.linearRampToValueAtTime(0.5, now + quickAttack);
-            gainNode.gain.linearRampToValueAtTime(0.5, now + duration - quickRelease);
-            gainNode.gain.linearRampToValueAtTime(0, now + duration);
+            // Simple envelope for scale notes, shared by every note
+            const envelope = buildScaleNoteCurve(duration, audioContext.sampleRate);
+            gainNode.gain.setValueCurveAtTime(envelope, startTime, duration);
             
-            oscillator.start(now);
-            oscillator.stop(now + duration);
-            
-            // Update status with current note
-            const timeUntilNoteStart = (startTime - audioContext.currentTime) * 1000;
-            
-            setTimeout(() => {{
-                updateStatus(`Playing ${{noteName}} (${{freq.toFixed(2)}}Hz)`);
-            }}, timeUntilNoteStart > 0 ? timeUntilNoteStart : 0);
-        }}
+            oscillator.start(startTime);
+            oscillator.stop(startTime + duration);
+            oscillator.onended = () => releaseVoice(oscillator, gainNode);
+            activeVoices++;
+        }
 
         /**
          * Utility functions for status display
+         * The status element is looked up once; this script runs after it in
+         * the document, so it already exists
+         */
+        const statusEl = document.getElementById('status');
+
+        /** @param {string} message */
+        function showStatus(message) {
+            statusEl.textContent = message;
+            statusEl.classList.add('active');
+        }
+
+        /**
+         * Writes immediately; followScale() calls this from its animation-frame
+         * callback and only when the note changes, so there is at most one
+         * textContent write per frame without deferring again
+         * @param {string} message
          */
-        function showStatus(message) {{
-            const status = document.getElementById('status');
-            status.textContent = message;
-            status.classList.add('active');
-        }}
-
-        function updateStatus(message) {{
-            const status = document.getElementById('status');
-            if (status.classList.contains('active')) {{
-                status.textContent = message;
-            }}
-        }}
-
-        function hideStatus() {{
-            const status = document.getElementById('status');
-            status.classList.remove('active');
-        }}
+        function updateStatus(message) {
+            if (statusEl.classList.contains('active')) {
+                statusEl.textContent = message;
+            }
+        }
+
+        function hideStatus() {
+            statusEl.classList.remove('active');
+        }
 
         // Log initialization
         console.log('Mulberry Web-Music IDE loaded');
-        console.log('Settings:', {{ frequency, waveform, attack, decay, sustain, release }});
+        document.addEventListener('DOMContentLoaded', () => {
+            console.log('Settings:', window.mulberryParams);
+        });
     </script>
+    <!-- mulberry:params -->
 </body>
 </html>
 """
 
+# Placeholder in STATIC_HTML that render_audio_component() replaces with the
+# #params script, so the settings land inside <body> like the other scripts
+PARAMS_MARKER = "<!-- mulberry:params -->"
+
+
+# The #params script, compiled once at import time; only the JSON payload is
+# substituted per render ($-placeholders, so the JS braces need no escaping)
+PARAMS_TEMPLATE = Template(
+    "<script id=\"params\" data-p='$payload'>"
+    "window.mulberryParams = Object.assign(window.mulberryParams || {}, "
+    "JSON.parse(document.currentScript.dataset.p));"
+    "</script>"
+)
+
+
+@st.cache_data
+def load_audio_shell():
+    """Return the static HTML shell of the audio component (built once)."""
+    return STATIC_HTML
+
+
+@st.cache_data(max_entries=64)
+def render_audio_component(frequency, waveform, attack, decay, sustain, release):
+    """Return the component HTML: the cached shell plus a tiny #params script.
+
+    Memoized on the six settings, so re-rendering unchanged settings is a
+    cache lookup; max_entries bounds the cache across sessions.
+    """
+    params = {
+        "frequency": frequency,
+        "waveform": waveform,
+        "attack": attack,
+        "decay": decay,
+        "sustain": sustain,
+        "release": release,
+        "minFrequency": MIN_FREQUENCY,
+    }
+    params_script = PARAMS_TEMPLATE.substitute(payload=html.escape(json.dumps(params)))
+    return load_audio_shell().replace(PARAMS_MARKER, params_script, 1)
+
+
 # Render the audio component
 st.markdown("---")
-components.html(audio_component_html, height=500, scrolling=True)
+components.html(
+    render_audio_component(**st.session_state.params),
+    height=500,
+    scrolling=True
+)
 
 # Additional information section
 st.markdown("---")